@@ -8,9 +8,51 @@
 
 # Импортируем необходимые библиотеки
 from flask import Flask, render_template, request, jsonify
+from flask_wtf import FlaskForm  # Валидация формы через скомпилированную схему
+from wtforms import StringField  # Поля формы
+from wtforms.validators import DataRequired, Length  # Правила валидации
 import requests  # Для выполнения HTTP-запросов к LLM API
+from requests.adapters import HTTPAdapter  # Для настройки пула соединений
+from urllib3.util.retry import Retry  # Для повторных попыток при сбоях API
+import atexit  # Для корректного закрытия HTTP-сессии при завершении процесса
+import concurrent.futures  # Для параллельных вызовов LLM API
+import threading  # Для ограничения одновременных вызовов API
+import time  # Для расчета пополнения токенов rate-limiter'а
+import logging  # Для логирования ошибок вместо print
+import logging.handlers  # QueueHandler/QueueListener для неблокирующего логирования
+import queue  # Очередь между обработчиками запросов и потоком логирования
 import os  # Для работы с переменными окружения
+import json  # Для разбора JSON ответа API
+from string import Template  # Шаблоны промптов, компилируются один раз при импорте
 from dotenv import load_dotenv  # Для загрузки API ключа из файла .env
+from llm_cache import LLMCache, make_cache_key  # Кэш ответов LLM
+
+# ijson - опциональный инкрементальный JSON парсер.
+# С ним поле "response" извлекается по мере прихода байтов из сети,
+# без буферизации всего тела ответа в памяти
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# orjson - опциональная быстрая JSON библиотека (Rust, SIMD).
+# Сериализует и парсит в разы быстрее stdlib json и выделяет меньше памяти -
+# заметно на длинных текстах в payload и многокилобайтных ответах
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# whitenoise - опциональная раздача статических файлов на уровне WSGI.
+# Статика отдается до входа в маршрутизацию Flask, поэтому потоки-обработчики
+# не отвлекаются от LLM-запросов на мелкие CSS/JS файлы
+try:
+    from whitenoise import WhiteNoise
+    WHITENOISE_AVAILABLE = True
+except ImportError:
+    WHITENOISE_AVAILABLE = False
 
 # ===========================================================================================
 # ИНИЦИАЛИЗАЦИЯ
@@ -22,13 +64,209 @@ load_dotenv()
 # Создаем Flask приложение
 app = Flask(__name__)
 
+# Отключаем авто-перезагрузку шаблонов.
+# По умолчанию Jinja проверяет mtime файла шаблона (системный вызов stat)
+# при КАЖДОМ render_template. Шаблоны меняются только с перезапуском процесса,
+# поэтому проверка не нужна - скомпилированный шаблон берется из кэша Jinja
+app.config["TEMPLATES_AUTO_RELOAD"] = False
+app.jinja_env.auto_reload = False
+
+# Прогреваем шаблон при старте: первая компиляция index.html происходит
+# при загрузке модуля, а не на первом запросе первого пользователя
+app.jinja_env.get_template("index.html")
+
+# Раздаем статику через WhiteNoise (если установлен):
+# - запросы к /static/* обслуживаются прямо на WSGI уровне, минуя Flask
+# - max_age на год: браузеры и CDN кэшируют ассеты и не ходят за ними повторно
+_static_root = os.path.join(app.root_path, "static")
+if WHITENOISE_AVAILABLE and os.path.isdir(_static_root):
+    app.wsgi_app = WhiteNoise(
+        app.wsgi_app,
+        root=_static_root,
+        prefix="static/",
+        max_age=31536000
+    )
+
+# ===========================================================================================
+# ЛОГИРОВАНИЕ
+# ===========================================================================================
+
+# Логирование через очередь вместо print.
+# Зачем это нужно?
+# - print пишет в stdout синхронно: под нагрузкой все потоки-обработчики
+#   выстраиваются в очередь за одним файловым дескриптором
+# - QueueHandler лишь кладет запись в очередь (микросекунды),
+#   а фоновый QueueListener выводит ее в stdout из отдельного потока
+_log_queue = queue.Queue(-1)  # -1 = без ограничения размера
+logger = logging.getLogger("translator")
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.setLevel(logging.INFO)
+
+# Фоновый поток, который забирает записи из очереди и пишет их в stdout
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+# Останавливаем поток логирования при завершении процесса
+# (дописывает оставшиеся в очереди записи)
+atexit.register(_log_listener.stop)
+
 # Загружаем API ключ из переменной окружения
 # API_KEY хранится в файле .env и загружается безопасно (не через код)
 API_KEY = os.getenv("MENTORPIECE_API_KEY")
 
+# Проверяем наличие ключа ОДИН РАЗ при старте приложения, а не на каждом вызове call_llm.
+# Зачем это нужно?
+# - Без ключа приложение бесполезно: лучше упасть сразу при загрузке,
+#   чем молча отдавать сообщение об ошибке первому же пользователю
+# - Из горячего пути call_llm убирается лишняя проверка на каждый запрос
+# Переменная TESTING позволяет импортировать модуль в тестах без реального ключа
+if not API_KEY and not os.getenv("TESTING"):
+    raise RuntimeError(
+        "MENTORPIECE_API_KEY не задан. Проверьте файл .env и переменную окружения MENTORPIECE_API_KEY"
+    )
+
 # URL API endpoint для отправки запросов к LLM модели
 API_ENDPOINT = "https://api.mentorpiece.org/v1/process-ai-request"
 
+# ===========================================================================================
+# HTTP-СЕССИЯ С ПУЛОМ СОЕДИНЕНИЙ
+# ===========================================================================================
+
+# Создаем одну HTTP-сессию на весь процесс вместо нового соединения на каждый запрос.
+# Зачем это нужно?
+# - requests.post() открывает новое TCP+TLS соединение при каждом вызове
+# - TLS handshake к api.mentorpiece.org занимает сотни миллисекунд
+# - Сессия держит keep-alive соединения в пуле и переиспользует их,
+#   поэтому второй вызов LLM в том же POST-запросе идет по уже открытому каналу
+_session = requests.Session()
+
+# Заголовки собираются РОВНО ОДИН РАЗ при импорте модуля:
+# - строка f"Bearer {API_KEY}" форматируется единожды за время жизни процесса
+# - словарь не пересоздается на каждый вызов call_llm
+# Authorization: Bearer <API_KEY> - стандартный способ передачи ключа в заголовке
+_AUTH_HEADERS = {
+    "Authorization": f"Bearer {API_KEY}",
+    "Content-Type": "application/json"  # Указываем, что отправляем JSON
+}
+
+# Устанавливаем заголовки на сессию - call_llm не передает их вообще
+_session.headers.update(_AUTH_HEADERS)
+
+# Просим сервер сжимать ответы: многокилобайтный текст анализа ужимается
+# в несколько раз, что сокращает время чтения ответа по сети.
+# requests распаковывает сжатое тело прозрачно для нашего кода.
+# brotli (br) заявляем только если установлен пакет для его распаковки;
+# если API сжатие не поддерживает - заголовок просто игнорируется
+try:
+    import brotli  # noqa: F401 - проверяем только наличие пакета
+    _session.headers["Accept-Encoding"] = "gzip, br"
+except ImportError:
+    _session.headers["Accept-Encoding"] = "gzip"
+
+# Настраиваем адаптер с пулом соединений и повторными попытками:
+# - pool_connections/pool_maxsize=50 - до 50 одновременных keep-alive соединений
+# - Retry прозрачно повторяет запрос при ВРЕМЕННЫХ ошибках 502/503/504
+#   с экспоненциальной паузой (0.5с, 1с, 2с), поэтому кратковременный сбой
+#   upstream-сервера не превращается в красное сообщение пользователю
+# - allowed_methods=['POST'] - по умолчанию urllib3 не повторяет POST,
+#   разрешаем явно (запрос к LLM идемпотентен с точки зрения приложения)
+# - raise_on_status=False - после исчерпания попыток отдать ответ как есть,
+#   чтобы наша обработка 4xx/5xx в call_llm сработала (ошибки авторизации
+#   и прочие 4xx не повторяются и доходят до пользователя сразу)
+_adapter = HTTPAdapter(
+    pool_connections=50,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False
+    )
+)
+_session.mount("https://", _adapter)
+
+# Закрываем сессию (и все keep-alive соединения) при завершении процесса
+atexit.register(_session.close)
+
+# Пул потоков для параллельных вызовов LLM API.
+# Зачем это нужно?
+# - Каждый вызов call_llm блокируется на сетевом I/O (до 30 секунд)
+# - API позволяет несколько одновременных запросов
+# - Длинный текст можно разбить на абзацы и переводить их параллельно,
+#   тогда общее время равно времени самого долгого абзаца, а не сумме всех
+_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# Кэш ответов LLM: одинаковая пара (модель, промпт) не отправляется к API повторно.
+# Перевод и оценка детерминированы с точки зрения приложения (информационные запросы),
+# поэтому их можно безопасно кэшировать. Ошибки ("❌ ...") не кэшируются.
+_llm_cache = LLMCache(maxsize=1024, ttl_seconds=3600)
+
+
+# ===========================================================================================
+# ОГРАНИЧЕНИЕ НАГРУЗКИ НА LLM API
+# ===========================================================================================
+
+class TokenBucket:
+    """
+    Классический token-bucket rate limiter.
+
+    Как это работает?
+    ------------------
+    - В "ведре" лежит до capacity токенов, каждый вызов API забирает один
+    - Токены пополняются с постоянной скоростью rate (токенов в секунду)
+    - Если токенов нет, вызывающий поток ждет, пока ведро пополнится
+
+    Это сглаживает всплески нагрузки: короткий burst проходит за счет запаса
+    токенов, а устойчивый поток запросов не превышает лимит провайдера (нет 429).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # скорость пополнения, токенов в секунду
+        self.capacity = capacity  # максимальный запас токенов
+        self._tokens = float(capacity)  # стартуем с полным ведром
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Забирает один токен, при необходимости дожидаясь пополнения.
+        """
+
+        while True:
+            with self._lock:
+                # Пополняем ведро пропорционально прошедшему времени
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+
+                # Токенов нет - считаем, сколько ждать до следующего
+                wait_time = (1.0 - self._tokens) / self.rate
+
+            # Спим БЕЗ блокировки, чтобы не задерживать другие потоки
+            time.sleep(wait_time)
+
+
+# Семафор ограничивает число ОДНОВРЕМЕННЫХ запросов к API (не больше 16),
+# а token bucket - их суммарную частоту (100 запросов в минуту).
+# Вместе они не дают burst'у пользователей превысить лимиты провайдера
+_SEM = threading.BoundedSemaphore(16)
+_RATE_BUCKET = TokenBucket(rate=100 / 60, capacity=100)
+
+# Счетчик запросов, находящихся "в полете" к API (для /metrics)
+_inflight_count = 0
+_inflight_lock = threading.Lock()
+
+# Склейка одинаковых одновременных запросов: ключ кэша -> Future с результатом.
+# Поток, первым начавший запрос, становится "владельцем" Future и выполняет его;
+# остальные потоки с тем же ключом ждут готовый результат вместо похода к API
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
 # ===========================================================================================
 # ВСПОМОГАТЕЛЬНАЯ ФУНКЦИЯ ДЛЯ РАБОТЫ С API
 # ===========================================================================================
@@ -57,82 +295,324 @@ def call_llm(model_name, messages):
     - Возвращает понятное сообщение об ошибке пользователю
     """
     
+    # Сначала проверяем кэш: если такая пара (модель, промпт) уже обрабатывалась,
+    # возвращаем сохраненный ответ без обращения к API (экономия времени и токенов)
+    cache_key = make_cache_key(model_name, messages)
+    cached_result = _llm_cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
+
+    # Склейка одинаковых одновременных запросов (request coalescing).
+    # Если два пользователя отправили один и тот же текст с разницей в секунды
+    # (типично для классов и демо), к API уходит ОДИН запрос, а второй поток
+    # просто ждет его результата через Future
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(cache_key)
+        if future is None:
+            # Мы первые - создаем Future и берем на себя реальный запрос
+            future = concurrent.futures.Future()
+            _INFLIGHT[cache_key] = future
+            owner = True
+        else:
+            # Такой же запрос уже выполняется - дождемся его результата
+            owner = False
+
+    if not owner:
+        # 35 секунд с запасом перекрывают таймаут самого запроса (5 + 30)
+        return future.result(timeout=35)
+
+    try:
+        result = _request_llm(model_name, messages, cache_key)
+        future.set_result(result)
+        return result
+    except BaseException as exc:
+        # _request_llm перехватывает все ожидаемые ошибки сам, но если что-то
+        # все же вылетело - передаем исключение ожидающим потокам, а не вешаем их
+        future.set_exception(exc)
+        raise
+    finally:
+        # Убираем ключ из "в полете": следующий такой же запрос пойдет
+        # через кэш (при успехе) или повторит попытку (при ошибке)
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(cache_key, None)
+
+
+def _request_llm(model_name, messages, cache_key):
+    """
+    Выполняет реальный HTTP запрос к LLM API (без кэша и склейки запросов).
+
+    Параметры:
+    -----------
+    model_name : str
+        Имя используемой модели
+
+    messages : str
+        Текст запроса/промпта для отправки в LLM
+
+    cache_key : str
+        Ключ кэша для сохранения успешного ответа
+
+    Возвращает:
+    -----------
+    str
+        Текст ответа от LLM или сообщение об ошибке
+    """
+
+    global _inflight_count
+
     try:
-        # Проверяем наличие API ключа перед отправкой запроса
-        if not API_KEY:
-            return "❌ Ошибка: API ключ не загружен. Проверьте файл .env и переменную MENTORPIECE_API_KEY"
-        
-        # Подготавливаем заголовки HTTP запроса
-        # Authorization: Bearer <API_KEY> - стандартный способ передачи ключа в заголовке
-        headers = {
-            "Authorization": f"Bearer {API_KEY}",
-            "Content-Type": "application/json"  # Указываем, что отправляем JSON
-        }
-        
         # Подготавливаем тело запроса в формате JSON
         # Формат соответствует требованиям API: { "model_name": "", "prompt": "" }
+        # Заголовки (Authorization, Content-Type) уже установлены на _session
         payload = {
             "model_name": model_name,
             "prompt": messages  # messages передается как prompt в API
         }
-        
-        # Отправляем POST запрос к API endpoint
-        # timeout=30 - ограничиваем время ожидания ответа 30 секундами
-        response = requests.post(
-            API_ENDPOINT,
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
-        
-        # Проверяем статус код ответа
-        # Если статус 200-299 - успешный ответ, иначе это ошибка
-        if response.status_code >= 400:
-            # Логируем ошибку для отладки (QA специалисты могут видеть это в логах)
-            error_message = f"API вернул ошибку: {response.status_code}"
-            if response.text:
-                error_message += f" - {response.text}"
-            print(f"⚠️  {error_message}")
-            return f"❌ Ошибка API (код {response.status_code}): Сервер не смог обработать запрос"
-        
-        # Парсим JSON ответ от API
-        # API возвращает формат: { "response": "текст ответа" }
-        response_json = response.json()
-        
-        # Извлекаем текст ответа из поля "response"
-        result = response_json.get("response", "❌ Ошибка: ответ API не содержит поле 'response'")
-        
+
+        # Сериализуем тело запроса заранее: orjson кодирует в разы быстрее,
+        # чем стандартный кодировщик внутри requests (Content-Type уже на сессии)
+        if ORJSON_AVAILABLE:
+            body = orjson.dumps(payload)
+        else:
+            body = json.dumps(payload).encode("utf-8")
+
+        # Ограничиваем нагрузку на API:
+        # - семафор: не больше 16 ОДНОВРЕМЕННЫХ запросов из этого процесса
+        # - token bucket: не больше 100 запросов в минуту суммарно
+        # Вместе это защищает от 429 (rate limit) при всплесках пользователей
+        with _SEM:
+            _RATE_BUCKET.acquire()
+
+            # Учитываем запрос "в полете" (виден в /metrics)
+            with _inflight_lock:
+                _inflight_count += 1
+
+            try:
+                # Отправляем POST запрос через общую сессию (keep-alive соединение из пула)
+                # timeout=(5, 30) - до 5 секунд на установку соединения, до 30 секунд на чтение ответа
+                # stream=True - тело ответа читается по частям, а не буферизуется целиком:
+                # для многокилобайтных ответов это снижает пиковую память и позволяет
+                # начать разбор JSON до прихода последнего байта
+                response = _session.post(
+                    API_ENDPOINT,
+                    data=body,
+                    timeout=(5, 30),
+                    stream=True
+                )
+
+                # Проверяем статус код ответа
+                # Если статус 200-299 - успешный ответ, иначе это ошибка
+                if response.status_code >= 400:
+                    # Логируем ошибку для отладки (QA специалисты могут видеть это в логах)
+                    error_message = f"API вернул ошибку: {response.status_code}"
+                    if response.text:
+                        error_message += f" - {response.text}"
+                    logger.warning(error_message)
+                    return f"❌ Ошибка API (код {response.status_code}): Сервер не смог обработать запрос"
+
+                # Парсим JSON ответ от API
+                # API возвращает формат: { "response": "текст ответа" }
+                missing_field_error = "❌ Ошибка: ответ API не содержит поле 'response'"
+
+                if IJSON_AVAILABLE:
+                    # Инкрементальный разбор: ijson извлекает поле "response" прямо из
+                    # сетевого потока, не собирая все тело ответа в один буфер.
+                    # decode_content=True - urllib3 прозрачно распаковывает сжатый ответ
+                    response.raw.decode_content = True
+                    result = next(ijson.items(response.raw, "response"), missing_field_error)
+                else:
+                    # Fallback без ijson: читаем тело по частям и парсим целиком.
+                    # orjson.loads работает с bytes напрямую и в разы быстрее stdlib;
+                    # его JSONDecodeError наследуется от ValueError и ловится ниже
+                    raw_body = b"".join(response.iter_content(chunk_size=65536))
+                    if ORJSON_AVAILABLE:
+                        response_json = orjson.loads(raw_body)
+                    else:
+                        response_json = json.loads(raw_body)
+                    result = response_json.get("response", missing_field_error)
+            finally:
+                # Запрос завершен (успешно или нет) - убираем из "в полете"
+                with _inflight_lock:
+                    _inflight_count -= 1
+
+        # Кэшируем только успешные ответы - сообщения об ошибках начинаются с "❌"
+        # и их кэширование заблокировало бы восстановление после временного сбоя
+        if not result.startswith("❌"):
+            _llm_cache.set(cache_key, result)
+
         return result
     
     # Обработка сетевых ошибок (соединение потеряно, таймаут и т.д.)
     except requests.exceptions.Timeout:
         error_msg = "❌ Ошибка: Таймаут при подключении к серверу. Сервер слишком долго отвечал (>30 сек)"
-        print(f"⚠️  {error_msg}")
+        logger.warning(error_msg)
         return error_msg
     
     except requests.exceptions.ConnectionError:
         error_msg = "❌ Ошибка: Не удалось подключиться к серверу. Проверьте интернет-соединение и URL API"
-        print(f"⚠️  {error_msg}")
+        logger.warning(error_msg)
         return error_msg
     
     except requests.exceptions.RequestException as e:
         error_msg = f"❌ Ошибка при отправке запроса: {str(e)}"
-        print(f"⚠️  {error_msg}")
+        logger.warning(error_msg)
         return error_msg
     
     # Обработка ошибок парсинга JSON
     except ValueError as e:
         error_msg = f"❌ Ошибка: Сервер вернул некорректный JSON. Детали: {str(e)}"
-        print(f"⚠️  {error_msg}")
+        logger.warning(error_msg)
         return error_msg
     
     # Ловим все остальные непредвиденные ошибки
     except Exception as e:
         error_msg = f"❌ Неожиданная ошибка: {str(e)}"
-        print(f"⚠️  {error_msg}")
+        logger.warning(error_msg)
         return error_msg
 
 
+# ===========================================================================================
+# ШАБЛОНЫ ПРОМПТОВ
+# ===========================================================================================
+
+# Постоянные части промптов собираются один раз при импорте модуля.
+# На каждый запрос остается только склеить их с переменными частями через "".join -
+# это одно выделение памяти без повторного разбора f-строки, что заметно
+# на длинных текстах и упрощает дальнейшую специализацию промптов.
+
+# Промпты выстроены так, чтобы СТАБИЛЬНАЯ часть (инструкция, критерии, формат)
+# шла первой, а переменные части (язык, тексты) - в самом конце.
+# Зачем это нужно?
+# - Провайдеры LLM кэшируют промпты по точному совпадению НАЧАЛА строки
+#   (prompt prefix caching)
+# - Если переменный текст стоит в середине, префикс у каждого запроса уникален
+#   и серверный кэш никогда не срабатывает
+# - Со стабильным префиксом все запросы делят одну кэшированную "шапку",
+#   что заметно ускоряет время до первого токена
+
+# Шаблоны создаются через string.Template один раз при импорте:
+# в отличие от f-строк, текст шаблона не разбирается заново на каждый запрос -
+# substitute лишь подставляет значения по именам ${placeholder}
+
+# Шаблон промпта для модели-переводчика
+_TRANSLATION_TMPL = Template("""Переведи следующий текст.
+Возвращай ТОЛЬКО перевод без комментариев и объяснений.
+
+Язык перевода: ${target_language}
+
+Исходный текст:
+${text}""")
+
+# Шаблон промпта для оценки качества перевода (LLM-as-a-Judge)
+_QUALITY_TMPL = Template("""Оцени качество следующего перевода от 1 до 10 и подробно аргументируй оценку.
+
+Оценка должна включать:
+- Точность передачи смысла
+- Грамматическую корректность
+- Естественность звучания
+- Сохранение стиля оригинала
+
+Формат ответа:
+Оценка: [число]
+Аргументация: [подробный анализ]
+
+===
+Исходный текст:
+${original_text}
+
+Перевод на ${target_language}:
+${translated_text}""")
+
+
+def _build_translation_prompt(text, target_language):
+    """
+    Строит промпт для модели-переводчика.
+
+    Параметры:
+    -----------
+    text : str
+        Текст (или отдельный абзац), который нужно перевести
+
+    target_language : str
+        Язык, на который выполняется перевод
+
+    Возвращает:
+    -----------
+    str
+        Готовый промпт для отправки в LLM
+    """
+
+    # Подставляем переменные части в заранее созданный шаблон
+    return _TRANSLATION_TMPL.substitute(target_language=target_language, text=text)
+
+
+def _build_quality_prompt(original_text, target_language, translated_text):
+    """
+    Строит промпт для оценки качества перевода (LLM-as-a-Judge).
+
+    Параметры:
+    -----------
+    original_text : str
+        Исходный текст до перевода
+
+    target_language : str
+        Язык, на который выполнялся перевод
+
+    translated_text : str
+        Полученный перевод
+
+    Возвращает:
+    -----------
+    str
+        Готовый промпт для отправки в LLM
+    """
+
+    # Подставляем переменные части в заранее созданный шаблон
+    # (стабильная "шапка" с критериями и форматом - первая, тексты - последними)
+    return _QUALITY_TMPL.substitute(
+        original_text=original_text,
+        target_language=target_language,
+        translated_text=translated_text
+    )
+
+
+# ===========================================================================================
+# ФОРМА ВВОДА
+# ===========================================================================================
+
+class TranslateForm(FlaskForm):
+    """
+    Форма перевода: текст и целевой язык.
+
+    Зачем здесь WTForms?
+    ---------------------
+    - Валидация и очистка (strip) описаны один раз декларативно,
+      а не повторяются вручную в каждом обработчике
+    - Length(max=50000) отсекает гигантские POST'ы ДО того, как они
+      превратятся в такой же гигантский (медленный и дорогой) промпт для LLM
+    """
+
+    class Meta:
+        # CSRF-токен отключен осознанно: в приложении нет сессий и аккаунтов,
+        # форма публичная и ее отправка не меняет состояние на сервере
+        csrf = False
+
+    # Текст для перевода: обязателен, не длиннее 50 000 символов
+    original_text = StringField(
+        "original_text",
+        filters=[lambda s: s.strip() if s else s],
+        validators=[DataRequired(), Length(max=50_000)]
+    )
+
+    # Целевой язык: короткая строка, по умолчанию English
+    target_language = StringField(
+        "target_language",
+        default="English",
+        filters=[lambda s: s.strip() if s else s],
+        validators=[Length(max=50)]
+    )
+
+
 # ===========================================================================================
 # МАРШРУТЫ (ROUTES) ПРИЛОЖЕНИЯ
 # ===========================================================================================
@@ -181,39 +661,55 @@ def index_post():
     HTML страница (templates/index.html) с результатами перевода и оценки
     """
     
-    # Извлекаем данные из HTML формы
-    # request.form содержит все данные, отправленные методом POST
-    original_text = request.form.get("original_text", "").strip()
-    target_language = request.form.get("target_language", "English").strip()
-    
-    # Проверяем, что пользователь ввел текст (не оставил поле пустым)
-    if not original_text:
-        # Возвращаем форму с сообщением об ошибке
+    # Валидируем данные формы через WTForms: поля очищаются (strip)
+    # и проверяются по декларативной схеме TranslateForm
+    form = TranslateForm()
+
+    if not form.validate():
+        # Текст пуст или превышает лимит - возвращаем форму с сообщением об ошибке,
+        # НЕ отправляя ничего к LLM API (экономия времени и токенов)
+        if form.original_text.data and form.original_text.errors:
+            error_message = "❌ Ошибка: Текст слишком длинный (максимум 50 000 символов)"
+        else:
+            error_message = "❌ Ошибка: Пожалуйста, введите текст для перевода"
+
         return render_template(
             "index.html",
-            original_text="",
-            translated_text="❌ Ошибка: Пожалуйста, введите текст для перевода",
+            original_text=form.original_text.data or "",
+            translated_text=error_message,
             quality_verdict=None
         )
+
+    original_text = form.original_text.data
+    # Пустой язык заменяем на English (как и отсутствующее поле)
+    target_language = form.target_language.data or "English"
     
     # ==========================================
     # ШАГ 1: ПЕРЕВОД ТЕКСТА
     # ==========================================
-    
-    # Создаем промпт (инструкцию) для модели-переводчика
-    # Промпт должен быть детальным и понятным для LLM
-    translation_prompt = f"""Переведи следующий текст на {target_language}. 
-Возвращай ТОЛЬКО перевод без комментариев и объяснений.
 
-Исходный текст:
-{original_text}"""
-    
-    # Вызываем функцию call_llm для выполнения перевода
-    # Используем модель Qwen/Qwen3-VL-30B-A3B-Instruct для перевода
-    translated_text = call_llm(
-        model_name="Qwen/Qwen3-VL-30B-A3B-Instruct",
-        messages=translation_prompt
-    )
+    # Разбиваем текст на абзацы (по пустой строке)
+    # Каждый абзац можно перевести независимо от остальных
+    paragraphs = [p for p in original_text.split("\n\n") if p.strip()]
+
+    if len(paragraphs) > 1:
+        # Несколько абзацев - переводим их ПАРАЛЛЕЛЬНО через пул потоков.
+        # _POOL.map сохраняет порядок результатов, поэтому перевод
+        # собирается в том же порядке, что и исходные абзацы
+        translated_parts = list(_POOL.map(
+            lambda p: call_llm(
+                model_name="Qwen/Qwen3-VL-30B-A3B-Instruct",
+                messages=_build_translation_prompt(p, target_language)
+            ),
+            paragraphs
+        ))
+        translated_text = "\n\n".join(translated_parts)
+    else:
+        # Один абзац - переводим одним вызовом без накладных расходов пула
+        translated_text = call_llm(
+            model_name="Qwen/Qwen3-VL-30B-A3B-Instruct",
+            messages=_build_translation_prompt(original_text, target_language)
+        )
     
     # ==========================================
     # ШАГ 2: ОЦЕНКА КАЧЕСТВА ПЕРЕВОДА
@@ -221,23 +717,7 @@ def index_post():
     
     # Создаем промпт для оценки качества перевода (LLM-as-a-Judge)
     # Инструкция должна быть четкой и понятной для оценки
-    quality_prompt = f"""Оцени качество следующего перевода от 1 до 10 и подробно аргументируй оценку.
-
-Исходный текст:
-{original_text}
-
-Перевод на {target_language}:
-{translated_text}
-
-Оценка должна включать:
-- Точность передачи смысла
-- Грамматическую корректность
-- Естественность звучания
-- Сохранение стиля оригинала
-
-Формат ответа:
-Оценка: [число]
-Аргументация: [подробный анализ]"""
+    quality_prompt = _build_quality_prompt(original_text, target_language, translated_text)
     
     # Вызываем функцию call_llm для оценки качества
     # Используем модель claude-sonnet-4-5-20250929 для оценки (лучше для анализа)
@@ -263,18 +743,54 @@ def index_post():
     )
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Обработчик GET запроса на страницу метрик.
+
+    Метод: GET
+    Роль: Показывает счетчики кэша и нагрузки на LLM API в формате JSON
+
+    Возвращает:
+    -----------
+    JSON с полями:
+    - cache_hits / cache_misses: эффективность кэша ответов LLM
+    - cache_size: текущее количество записей в кэше
+    - inflight_requests: сколько запросов к API выполняется прямо сейчас
+    """
+
+    with _inflight_lock:
+        inflight = _inflight_count
+
+    return jsonify({
+        "cache_hits": _llm_cache.hits,
+        "cache_misses": _llm_cache.misses,
+        "cache_size": len(_llm_cache),
+        "inflight_requests": inflight
+    })
+
+
 # ===========================================================================================
 # ЗАПУСК ПРИЛОЖЕНИЯ
 # ===========================================================================================
 
 if __name__ == "__main__":
-    # debug=True включает:
+    # Режим отладки включается переменной окружения FLASK_DEBUG=1 и дает:
     # - Автоперезагрузку при изменении кода
     # - Подробные сообщения об ошибках
     # - Интерактивный отладчик
-    # В production режиме нужно установить debug=False
+    # По умолчанию отладка ВЫКЛЮЧЕНА: debug-режим инструментирует каждый запрос
+    # (захват traceback'ов), а reloader держит второй процесс с file-watcher'ом -
+    # это лишние накладные расходы и удвоенная память вне разработки.
+    #
+    # threaded=True обрабатывает каждый запрос в отдельном потоке.
+    # Без этого один пользователь, ждущий ответа LLM (до 30 секунд),
+    # блокирует весь процесс и остальные запросы встают в очередь.
+    # Пока один поток ждет сетевой I/O, GIL освобождается и другие
+    # запросы обслуживаются параллельно.
     app.run(
         host="0.0.0.0",  # Приложение доступно на всех сетевых интерфейсах
         port=5000,        # Используем стандартный порт Flask
-        debug=True        # Режим отладки включен для разработки
+        debug=os.getenv("FLASK_DEBUG") == "1",  # Отладка только по явному запросу
+        threaded=True     # Параллельная обработка запросов
     )
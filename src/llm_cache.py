@@ -0,0 +1,126 @@
+# ===========================================================================================
+# llm_cache.py - Кэш ответов LLM API
+# ===========================================================================================
+# Описание: Кэширование ответов LLM по точному совпадению (model_name, prompt).
+# Зачем это нужно?
+# - Одинаковая пара (модель, промпт) всегда означает один и тот же платный запрос к API
+# - QA-специалисты и демо часто отправляют одни и те же тексты повторно
+# - Попадание в кэш превращает секунды ожидания (и расход токенов) в микросекунды
+# ===========================================================================================
+
+import hashlib  # Для вычисления SHA-256 ключа кэша
+import json  # Для детерминированной сериализации ключа
+import threading  # Для потокобезопасного доступа из нескольких обработчиков
+import time  # Для отслеживания времени жизни записей (TTL)
+from collections import OrderedDict  # Упорядоченный словарь для LRU-вытеснения
+
+
+def make_cache_key(model_name, prompt):
+    """
+    Вычисляет ключ кэша для пары (модель, промпт).
+
+    Параметры:
+    -----------
+    model_name : str
+        Имя используемой модели
+
+    prompt : str
+        Текст промпта
+
+    Возвращает:
+    -----------
+    str
+        SHA-256 хэш от детерминированного JSON представления пары.
+        sort_keys=True гарантирует одинаковый ключ независимо от порядка полей.
+    """
+
+    payload = json.dumps(
+        {"model": model_name, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Кэш ответов LLM в памяти процесса с LRU-вытеснением и TTL.
+
+    Как это работает?
+    ------------------
+    - Записи хранятся в OrderedDict: ключ -> (expires_at, value)
+    - При попадании запись перемещается в конец (самая "свежая")
+    - При переполнении удаляется самая "старая" запись (начало словаря)
+    - Просроченные записи (прошло больше ttl_seconds) считаются промахом
+
+    Параметры:
+    -----------
+    maxsize : int
+        Максимальное количество записей в кэше (по умолчанию 1024)
+
+    ttl_seconds : int
+        Время жизни записи в секундах (по умолчанию 3600 = 1 час)
+    """
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        # OrderedDict помнит порядок вставки - это и дает нам LRU
+        self._entries = OrderedDict()
+        # Блокировка нужна, потому что обработчики Flask работают в разных потоках
+        self._lock = threading.Lock()
+        # Счетчики для мониторинга эффективности кэша
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Возвращает закэшированное значение или None при промахе.
+
+        Промахом считается как отсутствие ключа, так и просроченная запись
+        (в этом случае запись сразу удаляется из кэша).
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+
+            # Проверяем, не истекло ли время жизни записи
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            # Перемещаем запись в конец - она снова "самая свежая" (LRU)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Сохраняет значение в кэш, вытесняя самую старую запись при переполнении.
+        """
+
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            # LRU-вытеснение: удаляем самые старые записи, пока не влезем в лимит
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Полностью очищает кэш (используется в тестах).
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,95 @@
+# ===========================================================================================
+# _llm_cache.py - Record/replay кэш вызовов LLM для тестов
+# ===========================================================================================
+# Что это такое?
+# ----------------
+# Вместо ручного написания mock-объектов тесты читают ответы LLM из файлов
+# в директории .llm-cache/ (по одному JSON файлу на запрос, имя = SHA-256
+# от аргументов вызова). Файлы закоммичены в репозиторий, поэтому:
+# - тесты детерминированы и работают офлайн, без API ключа и расхода токенов
+# - добавление нового сценария не требует писать mock payload вручную:
+#   достаточно один раз записать реальный ответ (LLM_TESTING_RECORD=1)
+# ===========================================================================================
+
+import hashlib
+import json
+import os
+
+# Директория с записанными ответами (лежит рядом с этим файлом, коммитится в репо)
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '.llm-cache')
+
+
+def cache_key(kwargs):
+    """
+    Вычисляет ключ кэша: SHA-256 от канонического JSON представления аргументов.
+
+    sort_keys=True дает одинаковый ключ независимо от порядка аргументов.
+    """
+
+    payload = json.dumps(kwargs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_path(key):
+    """
+    Путь к файлу с записанным ответом для данного ключа.
+    """
+
+    return os.path.join(CACHE_DIR, key + '.json')
+
+
+def save_response(kwargs, response):
+    """
+    Записывает ответ LLM в кэш (используется в режиме записи и для
+    первоначального наполнения кэша).
+
+    В файле хранятся и аргументы вызова - так записи можно читать глазами
+    и понимать, какому запросу они соответствуют.
+    """
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = dict(kwargs)
+    entry['response'] = response
+    with open(cache_path(cache_key(kwargs)), 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False, indent=2)
+
+
+def cached_call_llm(real_call_llm, **kwargs):
+    """
+    Замена app.call_llm для тестов: возвращает записанный ответ из кэша.
+
+    Режимы работы:
+    ---------------
+    - Обычный прогон (CI): ответ читается из .llm-cache/; если записи нет,
+      тест падает с понятной ошибкой (а не ходит в сеть)
+    - Режим записи (LLM_TESTING_RECORD=1): при промахе вызывается настоящая
+      функция call_llm, ответ сохраняется в кэш и коммитится в репозиторий
+
+    Параметры:
+    -----------
+    real_call_llm : callable
+        Оригинальная функция app.call_llm (до подмены), нужна для режима записи
+
+    **kwargs
+        Аргументы вызова (model_name, messages)
+    """
+
+    path = cache_path(cache_key(kwargs))
+
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['response']
+
+    if os.getenv('LLM_TESTING_RECORD') == '1':
+        # Режим записи: делаем реальный вызов и сохраняем ответ
+        response = real_call_llm(**kwargs)
+        save_response(kwargs, response)
+        return response
+
+    raise RuntimeError(
+        "Нет записанного ответа LLM для аргументов {!r} (ключ {}). "
+        "Запустите тесты с LLM_TESTING_RECORD=1 и реальным API ключом, "
+        "чтобы записать ответ, и закоммитьте файл из tests/.llm-cache/".format(
+            kwargs, cache_key(kwargs)
+        )
+    )
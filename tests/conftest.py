@@ -14,11 +14,17 @@ import os
 # Добавляем директорию src в путь Python, чтобы можно было импортировать app.py
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Режим тестирования: приложение проверяет наличие MENTORPIECE_API_KEY при импорте
+# и падает без него. В тестах реальный ключ не нужен (все запросы мокируются),
+# поэтому отключаем эту проверку ДО импорта приложения
+os.environ.setdefault('TESTING', '1')
+
 # Импортируем Flask приложение
+import app as app_module
 from app import app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
     """
     Фикстура Flask тестового клиента.
@@ -43,22 +49,149 @@ def client():
     -----------
     FlaskClient объект для отправки HTTP запросов
     
+    Почему scope="session"?
+    ------------------------
+    Клиент (и приложение с его Jinja окружением) создается ОДИН РАЗ на весь
+    прогон, а не перед каждым тестом. Сам по себе клиент без состояния,
+    поэтому делить его между тестами безопасно, а накладные расходы на
+    создание приложения не повторяются в каждом тесте.
+
     Пример использования в тесте:
     ----------------------------
     def test_something(client):
         response = client.post('/', data={'text': 'Hello'})
         assert response.status_code == 200
     """
-    
+
     # Устанавливаем режим тестирования (отключает error catching при обработке запросов)
     app.config['TESTING'] = True
-    
+
+    # Шаблон index.html уже скомпилирован при импорте приложения,
+    # а auto_reload выключен - тесты не платят за компиляцию и stat-вызовы
+
     # Создаем тестовый клиент
     with app.test_client() as test_client:
         # Возвращаем клиент для использования в тестах
         yield test_client
 
 
+@pytest.fixture(scope="session")
+def post_env_form():
+    """
+    Фикстура-фабрика готового WSGI environ для канонического POST запроса.
+
+    Зачем это нужно?
+    -----------------
+    client.post('/', data={...}) на каждый вызов заново кодирует форму
+    (urlencode) и строит WSGI environ. Для повторяющихся POST тестов эта
+    работа одинаковая - здесь она делается ОДИН РАЗ на сессию через
+    werkzeug EnvironBuilder, а тесты получают копии готового environ.
+
+    Почему фабрика, а не сам environ?
+    ----------------------------------
+    Поток wsgi.input вычитывается приложением при обработке запроса,
+    поэтому один environ нельзя отправить дважды. Фабрика отдает копию
+    словаря со свежим BytesIO над теми же (уже закодированными) байтами
+    тела - кодирование формы не повторяется.
+
+    Пример использования:
+    --------------------
+    def test_something(client, post_env_form):
+        response = client.open(post_env_form())
+    """
+
+    from io import BytesIO
+    from werkzeug.test import EnvironBuilder
+
+    builder = EnvironBuilder(path='/', method='POST', data={
+        'original_text': 'Привет, мир!',
+        'target_language': 'Английский'
+    })
+    base_env = builder.get_environ()
+    # Вычитываем закодированное тело один раз - дальше только BytesIO поверх него
+    body = base_env['wsgi.input'].read()
+
+    def make_environ(**overrides):
+        env = dict(base_env)
+        env['wsgi.input'] = BytesIO(body)
+        env.update(overrides)
+        return env
+
+    return make_environ
+
+
+@pytest.fixture(scope="session", autouse=True)
+def llm_replay():
+    """
+    Фикстура record/replay подмены call_llm (см. tests/_llm_cache.py).
+
+    Что она делает?
+    ----------------
+    На время всей сессии подменяет app.call_llm функцией, которая возвращает
+    записанные ответы из tests/.llm-cache/ вместо похода к реальному API.
+    Тесты, которым нужно особое поведение, по-прежнему могут накрыть ее
+    собственным @patch('app.call_llm') - он восстановит подмену после себя.
+
+    Управление:
+    ------------
+    - LLM_TESTING_REPLAY=0 отключает подмену (вызовы пойдут в настоящий call_llm)
+    - LLM_TESTING_RECORD=1 дозаписывает отсутствующие ответы через реальный API
+    """
+
+    if os.getenv('LLM_TESTING_REPLAY', '1') != '1':
+        # Подмена отключена - тесты работают с настоящим call_llm
+        yield app_module.call_llm
+        return
+
+    from tests._llm_cache import cached_call_llm
+
+    # Сохраняем оригинал ДО подмены - он нужен режиму записи
+    # и тестам, проверяющим сам call_llm (см. фикстуру real_call_llm)
+    original_call_llm = app_module.call_llm
+
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr(
+        app_module,
+        'call_llm',
+        lambda **kwargs: cached_call_llm(original_call_llm, **kwargs)
+    )
+
+    yield original_call_llm
+
+    monkeypatch.undo()
+
+
+@pytest.fixture
+def real_call_llm(llm_replay):
+    """
+    Фикстура с НЕподмененной функцией call_llm.
+
+    Зачем она нужна?
+    -----------------
+    Тесты класса TestCallLLMFunction проверяют сам call_llm (обработку
+    таймаутов, ошибок API и т.д.) с мокированным _session.post.
+    Им нужен оригинал функции, а не replay-подмена из llm_replay.
+    """
+
+    return llm_replay
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_cache():
+    """
+    Фикстура очистки кэша ответов LLM после каждого теста.
+
+    Почему это нужно?
+    ------------------
+    Клиент теперь живет всю сессию, поэтому изменяемое состояние приложения
+    (кэш ответов LLM) мог бы "протекать" между тестами. Очищаем только его -
+    остальное состояние приложения неизменяемое.
+    """
+
+    yield
+    app_module._llm_cache.clear()
+
+
 @pytest.fixture
 def mock_api_key(monkeypatch):
     """
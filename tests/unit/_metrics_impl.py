@@ -0,0 +1,75 @@
+"""Pure-Python cores of the translation-quality metrics.
+
+These functions are deliberately kept free of NumPy/sklearn and fully
+type-annotated so the module can be AOT-compiled as-is:
+
+    pip install mypy
+    mypyc tests/unit/_metrics_impl.py
+
+mypyc drops the compiled extension next to this file; importing
+``tests.unit._metrics_impl`` then picks up the .so automatically and the
+interpreted source remains the fallback. Compilation is optional - the
+test suite runs identically either way, just slower in the hot loops
+(per-opcode interpreter dispatch instead of native int ops).
+"""
+
+import math
+from collections import Counter
+from typing import Sequence
+
+
+def _simple_bleu_core(ref_tokens: Sequence[str], hyp_tokens: Sequence[str]) -> float:
+    """Token-level core of simple_bleu: callers tokenize (and lowercase) once
+    and can reuse the token lists across several metric calls."""
+    if not hyp_tokens:
+        return 0.0
+    # clipped unigram precision: each hypothesis token counts at most as many
+    # times as it appears in the reference (proper BLEU semantics - a repeated
+    # token can no longer inflate the score), in O(|hyp|+|ref|) via Counter
+    ref_counts: Counter = Counter(ref_tokens)
+    hyp_counts: Counter = Counter(hyp_tokens)
+    matches: int = sum(min(count, ref_counts[t]) for t, count in hyp_counts.items())
+    precision: float = matches / len(hyp_tokens)
+    # brevity penalty: exact fast path for the common equal-length case,
+    # otherwise a branchless min() folds the hyp_len >= ref_len case into
+    # exp(0.0) == 1.0 instead of a data-dependent branch around math.exp
+    ref_len: int = len(ref_tokens)
+    hyp_len: int = len(hyp_tokens)
+    if ref_len == hyp_len:
+        bp: float = 1.0
+    else:
+        bp = math.exp(min(0.0, 1.0 - ref_len / hyp_len))
+    return precision * bp
+
+
+def _lcs_length_python(a: Sequence[str], b: Sequence[str]) -> int:
+    """Pure-Python LCS fallback used when NumPy is missing.
+
+    The DP recurrence for row i only reads row i+1, so instead of a full
+    (n+1) x (m+1) matrix of Python ints we keep two length-(m+1) rows that
+    swap each outer iteration: O(m) live objects instead of O(n*m).
+    """
+    n: int = len(a)
+    m: int = len(b)
+    nxt: list = [0] * (m + 1)  # row i+1
+    cur: list = [0] * (m + 1)  # row i; cur[m] stays 0 and is never written
+    for i in range(n - 1, -1, -1):
+        a_i: str = a[i]
+        for j in range(m - 1, -1, -1):
+            if a_i == b[j]:
+                cur[j] = 1 + nxt[j + 1]
+            else:
+                cur[j] = nxt[j] if nxt[j] >= cur[j + 1] else cur[j + 1]
+        cur, nxt = nxt, cur
+    return nxt[0]
+
+
+def _jaccard_core(ref_set: set, hyp_set: set) -> float:
+    """Token-set core of the Jaccard fallback: takes pre-built token sets."""
+    if not ref_set and not hyp_set:
+        return 1.0
+    if not ref_set or not hyp_set:
+        return 0.0
+    inter: set = ref_set & hyp_set
+    union: set = ref_set | hyp_set
+    return len(inter) / len(union)
@@ -0,0 +1,139 @@
+# ===========================================================================================
+# test_llm_cache.py - Юнит-тесты для кэша ответов LLM (src/llm_cache.py)
+# ===========================================================================================
+# Этот файл проверяет:
+# 1. Сохранение и чтение значений по ключу (model_name, prompt)
+# 2. Истечение времени жизни записей (TTL)
+# 3. LRU-вытеснение при переполнении кэша
+# ===========================================================================================
+
+import os
+import sys
+
+# Добавляем src в путь для импорта модуля кэша
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from llm_cache import LLMCache, make_cache_key
+
+
+class TestLLMCache:
+    """
+    Класс TestLLMCache содержит тесты для класса LLMCache.
+
+    Что тестируем?
+    ---------------
+    Кэш должен возвращать сохраненные ответы по точному ключу,
+    забывать просроченные записи и не расти бесконечно (LRU-лимит).
+    """
+
+    def test_set_and_get(self):
+        """
+        ТЕСТ: Сохраненное значение возвращается по тому же ключу.
+
+        Сценарий:
+        ---------
+        1. Вычисляем ключ для пары (модель, промпт)
+        2. Сохраняем ответ в кэш
+        3. Читаем по тому же ключу
+
+        Ожидаемый результат:
+        --------------------
+        get() возвращает ровно то значение, которое было сохранено
+        """
+
+        cache = LLMCache(maxsize=10, ttl_seconds=60)
+        key = make_cache_key('Qwen/Qwen3-VL-30B-A3B-Instruct', 'Переведи: Hello')
+
+        cache.set(key, 'Привет')
+
+        assert cache.get(key) == 'Привет', "Кэш должен вернуть сохраненное значение"
+        assert cache.hits == 1, "Попадание должно учитываться в счетчике hits"
+
+    def test_miss_on_unknown_key(self):
+        """
+        ТЕСТ: Неизвестный ключ - это промах (None).
+
+        Ожидаемый результат:
+        --------------------
+        get() возвращает None, счетчик misses увеличивается
+        """
+
+        cache = LLMCache(maxsize=10, ttl_seconds=60)
+
+        assert cache.get(make_cache_key('model', 'prompt')) is None, \
+            "Неизвестный ключ должен давать промах"
+        assert cache.misses == 1, "Промах должен учитываться в счетчике misses"
+
+    def test_keys_differ_for_different_prompts(self):
+        """
+        ТЕСТ: Разные промпты (и разные модели) дают разные ключи.
+
+        Ожидаемый результат:
+        --------------------
+        Ключи не совпадают - ответы не перепутаются между запросами
+        """
+
+        key_a = make_cache_key('model-a', 'prompt')
+        key_b = make_cache_key('model-b', 'prompt')
+        key_c = make_cache_key('model-a', 'other prompt')
+
+        assert key_a != key_b, "Разные модели должны давать разные ключи"
+        assert key_a != key_c, "Разные промпты должны давать разные ключи"
+        assert key_a == make_cache_key('model-a', 'prompt'), \
+            "Одинаковая пара должна давать одинаковый ключ"
+
+    def test_ttl_expiration(self):
+        """
+        ТЕСТ: Просроченная запись считается промахом.
+
+        Сценарий:
+        ---------
+        1. Создаем кэш с нулевым TTL (записи истекают мгновенно)
+        2. Сохраняем значение и сразу читаем его
+
+        Ожидаемый результат:
+        --------------------
+        get() возвращает None - запись уже истекла
+        """
+
+        cache = LLMCache(maxsize=10, ttl_seconds=0)
+        key = make_cache_key('model', 'prompt')
+
+        cache.set(key, 'value')
+
+        assert cache.get(key) is None, "Запись с истекшим TTL должна давать промах"
+
+    def test_lru_eviction(self):
+        """
+        ТЕСТ: При переполнении вытесняется самая старая запись.
+
+        Сценарий:
+        ---------
+        1. Создаем кэш на 2 записи и заполняем его
+        2. Обращаемся к первой записи (делаем ее "свежей")
+        3. Добавляем третью запись
+
+        Ожидаемый результат:
+        --------------------
+        Вытеснена вторая запись (самая давно не использованная),
+        первая и третья остались в кэше
+        """
+
+        cache = LLMCache(maxsize=2, ttl_seconds=60)
+        key1 = make_cache_key('model', 'prompt-1')
+        key2 = make_cache_key('model', 'prompt-2')
+        key3 = make_cache_key('model', 'prompt-3')
+
+        cache.set(key1, 'one')
+        cache.set(key2, 'two')
+
+        # Обращение к key1 делает ее самой "свежей"
+        assert cache.get(key1) == 'one'
+
+        # Третья запись вытесняет самую старую (key2)
+        cache.set(key3, 'three')
+
+        assert len(cache) == 2, "Размер кэша не должен превышать maxsize"
+        assert cache.get(key2) is None, "Самая старая запись должна быть вытеснена"
+        assert cache.get(key1) == 'one', "Недавно использованная запись должна остаться"
+        assert cache.get(key3) == 'three', "Новая запись должна остаться"